@@ -1,6 +1,16 @@
 import logging
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+import pandas as pd
+from dotenv import load_dotenv
+from tzlocal import get_localzone
+
+# LOG_LEVEL may be set in .env, which the pages load only after importing the service
+load_dotenv()
+
+# Local timezone, resolved once per process (tzlocal returns a zoneinfo.ZoneInfo)
+LOCAL_TZ = get_localzone()
+LOCAL_TZ_NAME = str(LOCAL_TZ)
 
 def setup_logger(name, log_dir="logs"):
     """
@@ -18,9 +28,9 @@ def setup_logger(name, log_dir="logs"):
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
     
-    # Create logger
+    # Create logger (INFO unless LOG_LEVEL=DEBUG opts in to the per-update traces)
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
     
     # Avoid duplicate handlers
     if logger.hasHandlers():
@@ -49,5 +59,90 @@ def setup_logger(name, log_dir="logs"):
     return logger
 
 
+def flatten_state_changes(analysis_results):
+    """
+    Flatten analyze_state_changes output into one row per state change
+    
+    Args:
+        analysis_results: Dict of state -> {'count', 'items'} from AzureDevOpsService,
+            where 'items' holds one list per column
+    
+    Returns:
+        pd.DataFrame: Raw item fields plus a 'State' column, or None if there are no items
+    """
+    columns = ('id', 'title', 'date', 'project', 'work_item_type',
+               'area_path', 'tags', 'old_state', 'changed_by')
+    
+    # Concatenate the per-state column lists; no per-row objects are built
+    data = {column: [] for column in columns}
+    states = []
+    for state, result in analysis_results.items():
+        items = result['items']
+        for column in columns:
+            data[column].extend(items[column])
+        states.extend([state] * len(items['id']))
+    
+    if not states:
+        return None
+    
+    items_df = pd.DataFrame(data)
+    items_df['State'] = states
+    return items_df
+
+
+def build_all_items(items_df, url):
+    """
+    Build the Detailed Results table
+    
+    Args:
+        items_df: Frame returned by flatten_state_changes
+        url: Azure DevOps organization URL used for work item links
+    
+    Returns:
+        pd.DataFrame: Display-ready detailed results
+    """
+    # Parse every state change date in one vectorized pass (minute precision, as displayed)
+    change_dates = pd.to_datetime(items_df['date'], format='ISO8601', utc=True).dt.floor('min')
+    
+    df = pd.DataFrame({
+        'ID': url + '/' + items_df['project'] + '/_workitems/edit/' + items_df['id'].astype(str),
+        'Title': items_df['title'],
+        'Type': items_df['work_item_type'],
+        'Old State': items_df['old_state'],
+        'State': items_df['State'],
+        'Area Path': items_df['area_path'],
+        'Tags': items_df['tags'],
+        'Changed By': items_df['changed_by'],
+        'State Change Date': change_dates.dt.tz_convert(LOCAL_TZ) - timedelta(hours=2),
+        'SCD UTC': change_dates.dt.tz_localize(None)
+    })
+    
+    # Arrow-backed strings hand st.dataframe ready-made Arrow buffers
+    # instead of converting object columns cell by cell on every rerun
+    return df.astype({
+        column: 'string[pyarrow]'
+        for column in ('ID', 'Title', 'Type', 'Old State', 'State', 'Area Path', 'Tags', 'Changed By')
+    })
+
+
+def build_cross_tab(items_df):
+    """
+    Build the State Count by Project table
+    
+    Args:
+        items_df: Frame returned by flatten_state_changes
+    
+    Returns:
+        pd.DataFrame: State counts per project with Total row and column
+    """
+    cross_df = (
+        pd.crosstab(items_df['project'], items_df['State'], margins=True, margins_name='Total')
+        .reset_index()
+        .rename(columns={'project': 'Project'})
+    )
+    cross_df.columns.name = None
+    return cross_df
+
+
 # At the top of the file, after imports:
 logger = setup_logger('azure_devops_service')
\ No newline at end of file
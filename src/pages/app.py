@@ -1,27 +1,180 @@
 import streamlit as st
 import os
+import math
+import hashlib
+import threading
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-import pandas as pd
+from datetime import datetime
 from src.services.azure_devops_service import AzureDevOpsService
 from src.config import all_states, all_work_item_types
-from tzlocal import get_localzone
-import time
+from src.helpers import LOCAL_TZ, LOCAL_TZ_NAME, flatten_state_changes, build_all_items, build_cross_tab
 
 # Load environment variables
 load_dotenv()
 
+st.set_page_config(layout="wide", page_title="Analyzer WITs ADO")
+
 # Azure DevOps configuration
 AZURE_DEVOPS_URL = os.getenv('AZURE_DEVOPS_URL')
 AZURE_DEVOPS_PAT = os.getenv('AZURE_DEVOPS_PAT')
 
-# Initialize Azure DevOps service
-azure_service = AzureDevOpsService(AZURE_DEVOPS_URL, AZURE_DEVOPS_PAT)
+# Rows sent to the browser per page of the detailed results table
+PAGE_SIZE = 200
+
+@st.cache_resource
+def get_azure_service(url, pat):
+    """Single service instance shared across reruns so its in-memory caches survive"""
+    return AzureDevOpsService(url, pat)
+
+
+@st.cache_data(ttl="1h", max_entries=16, show_spinner=False)
+def _cached_projects(url, pat):
+    return get_azure_service(url, pat).get_team_projects()
+
+
+def _build_results(analysis_results, url):
+    """Turn analyze_state_changes output into (details_df, cross_df), or (None, None) when empty"""
+    items_df = flatten_state_changes(analysis_results)
+    if items_df is None:
+        return None, None
+    return build_all_items(items_df, url), build_cross_tab(items_df)
+
+
+@st.cache_resource
+def _results_cache():
+    """Finished analyses keyed on the filter inputs, shared across sessions (10 min, 32 entries)"""
+    return TTLCache(maxsize=32, ttl=600), threading.Lock()
+
+
+def _get_cached_results(key):
+    cache, lock = _results_cache()
+    with lock:
+        return cache.get(key)
+
+
+def _store_results(key, results):
+    cache, lock = _results_cache()
+    with lock:
+        cache[key] = results
+
+
+def run_analysis(service, projects, types, start, end, states, on_step, on_progress):
+    """
+    Run the full fetch + analysis pipeline
+    
+    Not cached itself: on_step/on_progress drive page elements, which
+    st.cache_data can't replay. The page caches the returned frames instead.
+    
+    Args:
+        service: AzureDevOpsService to fetch with
+        projects, types, states: Selected filters
+        start, end: Date range bounds
+        on_step: Callback(label, message) for each pipeline stage
+        on_progress: Callback(fraction) while fetching updates
+    
+    Returns:
+        tuple: (details_df, cross_df, errors); the frames are None when no state
+        changes matched, errors lists fetches that failed and were skipped
+    """
+    # Collected for this run only; the service is shared by every session
+    errors = []
+    
+    on_step("Fetching work item revisions...", "Step 1: Retrieving unique work item IDs from Azure DevOps...")
+    
+    # Get unique work item IDs from all days in range
+    revisions_data = service.get_work_item_revisions(list(projects), list(types), start, end, errors=errors)
+    
+    total_ids = revisions_data['total_unique_ids']
+    work_item_ids = revisions_data['work_item_ids']
+    on_step("Fetching work item revisions...", f"✓ Found {total_ids} unique work items")
+    
+    on_step("Fetching work item updates...", "Step 2: Fetching historical updates for each work item...")
+    
+    # This will fetch updates concurrently with caching
+    for idx, _ in enumerate(service.fetch_work_item_updates(work_item_ids, errors=errors), 1):
+        on_progress(idx / total_ids)
+    
+    on_step("Fetching work item updates...", "✓ Updates retrieved and cached")
+    on_step("Analyzing state changes...", "Step 3: Analyzing state changes within date range...")
+    
+    # Analyze state changes
+    analysis_results = service.analyze_state_changes(work_item_ids, list(states), start, end, errors=errors)
+    
+    on_step("Analyzing state changes...", "Preparing results...")
+    return (*_build_results(analysis_results, service.url), errors)
+
+
+def _current_page(df):
+    """Return only the rows of df for the page selected in the paginator"""
+    total_pages = max(1, math.ceil(len(df) / PAGE_SIZE))
+    page = 1
+    if total_pages > 1:
+        page = st.number_input(
+            f"Page (of {total_pages}, {len(df)} rows)",
+            min_value=1,
+            max_value=total_pages,
+            value=1,
+            step=1,
+            key="results_page"
+        )
+    return df.iloc[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+
+
+# Column configuration for the result tables
+_CROSS_COLUMN_CONFIG = {
+    "Project": st.column_config.Column(
+        "Project",
+        width="medium",
+        pinned="left"
+    )
+}
+
+_DETAILS_COLUMN_CONFIG = {
+    "ID": st.column_config.LinkColumn(
+        "ID",
+        width="small",
+        pinned="left",
+        help="Go to work item ADO",
+        display_text=r"(\d+)$"
+    ),
+    "State Change Date": st.column_config.DatetimeColumn(
+        "State Change Date (Local)",
+        timezone=LOCAL_TZ_NAME,
+        format="MM/DD/YYYY HH:mm:ss",
+        width="medium"
+    ),
+    "SCD UTC": st.column_config.DatetimeColumn(
+        "State Change Date (UTC)",
+        format="MM/DD/YYYY HH:mm:ss",
+        width="medium"
+    ),
+    "Area Path": st.column_config.Column(
+        "Area Path",
+        width="medium"
+    ),
+    "Tags": st.column_config.Column(
+        "Tags",
+        width="medium"
+    )
+}
+
+
+@st.fragment
+def _render_results(df, cross_df):
+    """Render both result tables; as a fragment, paging reruns only this block"""
+    if cross_df is not None:
+        st.subheader("State Count by Project")
+        st.dataframe(cross_df, hide_index=True, column_config=_CROSS_COLUMN_CONFIG)
+
+    st.subheader("Detailed Results")
+    st.dataframe(_current_page(df), hide_index=True, column_config=_DETAILS_COLUMN_CONFIG)
+
 
 # Streamlit UI
-local_tz = datetime.now().astimezone().tzinfo
+local_tz = datetime.now(LOCAL_TZ).tzname()
 st.title(f"Analyzer WITs ADO - Historical Analysis")
-st.badge(f"Timezone: ({local_tz}) {str(get_localzone())} ", icon=":material/globe_location_pin:")
+st.badge(f"Timezone: ({local_tz}) {LOCAL_TZ_NAME} ", icon=":material/globe_location_pin:")
 
 
 # Initialize session state for caching results
@@ -31,7 +184,6 @@ if 'cross_df' not in st.session_state:
     st.session_state.cross_df = None
 
 # Configuration section
-st.set_page_config(layout="wide")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
@@ -45,7 +197,10 @@ with col1:
 with col2:
     # Team Project selection
     try:
-        available_projects = azure_service.get_team_projects()
+        # Loaded once per session; later reruns don't even hit the data cache
+        if 'available_projects' not in st.session_state:
+            st.session_state.available_projects = _cached_projects(AZURE_DEVOPS_URL, AZURE_DEVOPS_PAT)
+        available_projects = st.session_state.available_projects
         selected_projects = st.multiselect(
             "Select Team Projects",
             available_projects,
@@ -74,176 +229,57 @@ with col4:
 # Analysis button
 analyze_button = st.button("Go Analyze", type="primary", width="stretch", help="Click to start analyze", icon=":material/rocket_launch:")
 
+fresh_results = False
+
 if analyze_button and selected_states and selected_projects and work_item_types:
     try:
-        with st.status("Fetching work item revisions...", expanded=True) as status:
-            st.write("Step 1: Retrieving unique work item IDs from Azure DevOps...")
-            
-            # Get unique work item IDs from all days in range
-            revisions_data = azure_service.get_work_item_revisions(
-                selected_projects,
-                work_item_types,
-                start_datetime,
-                end_datetime
-            )
-            
-            total_ids = revisions_data['total_unique_ids']
-            st.write(f"✓ Found {total_ids} unique work items")
-            time.sleep(1)
-            
-            st.write("Step 2: Fetching historical updates for each work item...")
-            progress_bar = st.progress(0)
-            
-            # This will fetch updates with caching
-            work_item_ids = revisions_data['work_item_ids']
-            for idx, wi_id in enumerate(work_item_ids):
-                azure_service.get_work_item_updates(wi_id)
-                progress_bar.progress((idx + 1) / total_ids)
-            
-            st.write("✓ Updates retrieved and cached")
-            time.sleep(1)
-            
-            st.write("Step 3: Analyzing state changes within date range...")
-            
-            # Analyze state changes
-            analysis_results = azure_service.analyze_state_changes(
-                work_item_ids,
-                selected_states,
-                start_datetime,
-                end_datetime
-            )
-            
-            time.sleep(1)
-            st.write("Preparing results...")
-            time.sleep(1)
+        # Keyed on a digest so the PAT itself isn't held in the shared cache
+        cache_key = (
+            AZURE_DEVOPS_URL, hashlib.sha256((AZURE_DEVOPS_PAT or "").encode("utf-8")).hexdigest(),
+            tuple(selected_projects), tuple(work_item_types),
+            start_datetime, end_datetime, tuple(selected_states)
+        )
+        cached = _get_cached_results(cache_key)
+        if cached is not None:
+            df, cross_df = cached
+        else:
+            service = get_azure_service(AZURE_DEVOPS_URL, AZURE_DEVOPS_PAT)
             
-            status.update(
-                label="Analysis complete!", state="complete", expanded=False
-            )
-
-        # Prepare data for analysis
-        all_items = []
-        state_project_counts = {}
-
-        for state, data in analysis_results.items():
-            for item in data['items']:
-                # Add to all items list
-                all_items.append({
-                    'ID': f"{AZURE_DEVOPS_URL}/{item['project']}/_workitems/edit/{item['id']}",
-                    'Title': item['title'],
-                    'State': state,
-                    'Old State': item.get('old_state', 'N/A'),
-                    'Type': item.get('work_item_type', ''),
-                    'Area Path': item.get('area_path', ''),
-                    'Tags': item.get('tags', ''),
-                    'Changed By': item.get('changed_by', 'Unknown'),
-                    'State Change Date': pd.to_datetime(item['date']).strftime('%m/%d/%Y %H:%M'),
-                    'SCD UTC': pd.to_datetime(item['date']).strftime('%m/%d/%Y %H:%M')
-                })
+            with st.status("Fetching work item revisions...", expanded=True) as status:
+                progress_bar = st.progress(0)
+
+                def on_step(label, message):
+                    status.update(label=label)
+                    st.write(message)
+
+                df, cross_df, errors = run_analysis(
+                    service,
+                    selected_projects,
+                    work_item_types,
+                    start_datetime,
+                    end_datetime,
+                    selected_states,
+                    on_step,
+                    progress_bar.progress
+                )
+                progress_bar.progress(1.0)
                 
-                # Count for cross table
-                project = item['project']
-                if project not in state_project_counts:
-                    state_project_counts[project] = {}
-                if state not in state_project_counts[project]:
-                    state_project_counts[project][state] = 0
-                state_project_counts[project][state] += 1
-
-        # Display cross table
-        if state_project_counts:
-            st.divider()
-            st.subheader("State Count by Project")
-            
-            # Get unique states
-            unique_states = sorted(list(set(
-                state 
-                for project_counts in state_project_counts.values() 
-                for state in project_counts.keys()
-            )))
-            
-            # Create DataFrame for cross table
-            cross_table_data = []
-            for project in state_project_counts:
-                row = {'Project': project}
-                for state in unique_states:
-                    row[state] = state_project_counts[project].get(state, 0)
-                cross_table_data.append(row)
-            
-            cross_df = pd.DataFrame(cross_table_data)
-            
-            # Add total row and column
-            cross_df['Total'] = cross_df[unique_states].sum(axis=1)
-            total_row = pd.DataFrame([{
-                'Project': 'Total',
-                **{state: cross_df[state].sum() for state in unique_states},
-                'Total': cross_df['Total'].sum()
-            }])
-            cross_df = pd.concat([cross_df, total_row], ignore_index=True)
-            
-            # Store in session state
-            st.session_state.cross_df = cross_df
-            
-            st.dataframe(
-                cross_df,
-                hide_index=True,
-                column_config={
-                    "Project": st.column_config.Column(
-                        "Project",
-                        width="medium",
-                        pinned="left"
-                    )
-                }
-            )
-
-        # Display detailed table
-        if all_items:
-            st.divider()
-            st.subheader("Detailed Results")
-            
-            df = pd.DataFrame(all_items)
-            df = df[['ID', 'Title', 'Type', 'Old State', 'State', 'Area Path', 'Tags', 'Changed By', 'State Change Date', 'SCD UTC']]
+                status.update(
+                    label="Analysis complete!", state="complete", expanded=False
+                )
             
-            # Store in session state
-            st.session_state.analysis_df = df
-            df["State Change Date"] = (
-                pd.to_datetime(df["State Change Date"], utc=True, errors="coerce")
-                .dt.tz_convert(get_localzone())  
-                - timedelta(hours=2)
-            )
-
-            st.dataframe(
-                df,
-                hide_index=True,
-                column_config={
-                    "ID": st.column_config.LinkColumn(
-                        "ID",
-                        width="small",
-                        pinned="left",
-                        help="Go to work item ADO",
-                        display_text=r"(\d+)$"
-                    ),
-                    "State Change Date": st.column_config.DatetimeColumn(
-                        "State Change Date (Local)",
-                        timezone=str(get_localzone()),
-                        format="MM/DD/YYYY HH:mm:ss",
-                        width="medium"
-                    ),
-                    "SCD UTC": st.column_config.DatetimeColumn(
-                        "State Change Date (UTC)",
-                        format="MM/DD/YYYY HH:mm:ss",
-                        width="medium"
-                    ),
-                    "Area Path": st.column_config.Column(
-                        "Area Path",
-                        width="medium"
-                    ),
-                    "Tags": st.column_config.Column(
-                        "Tags",
-                        width="medium"
-                    )
-                }
-            )
-        else:
+            # Skipped fetches mean partial results: show them, but don't cache them
+            if not errors:
+                _store_results(cache_key, (df, cross_df))
+            else:
+                st.warning("Some requests failed; results may be incomplete. See the log for details.")
+
+        # Store in session state; rendering below always reads from there
+        st.session_state.analysis_df = df
+        st.session_state.cross_df = cross_df
+        fresh_results = df is not None
+
+        if not fresh_results:
             st.warning("No state changes found for the selected criteria.")
 
     except Exception as e:
@@ -251,55 +287,10 @@ if analyze_button and selected_states and selected_projects and work_item_types:
         import traceback
         st.error(traceback.format_exc())
 
-# Display cached results if available (when not running new analysis)
-elif st.session_state.analysis_df is not None and not analyze_button:
+# Display results from session state: freshly computed ones after an analysis,
+# otherwise the last ones, without rebuilding any DataFrame
+if st.session_state.analysis_df is not None:
     st.divider()
-    st.subheader("Last Analysis Results")
-    
-    if st.session_state.cross_df is not None:
-        st.subheader("State Count by Project")
-        st.dataframe(
-            st.session_state.cross_df,
-            hide_index=True,
-            column_config={
-                "Project": st.column_config.Column(
-                    "Project",
-                    width="medium",
-                    pinned="left"
-                )
-            }
-        )
-    
-    st.subheader("Detailed Results")
-    st.dataframe(
-        st.session_state.analysis_df,
-        hide_index=True,
-        column_config={
-            "ID": st.column_config.LinkColumn(
-                "ID",
-                width="small",
-                pinned="left",
-                help="Go to work item ADO",
-                display_text=r"(\d+)$"
-            ),
-            "State Change Date": st.column_config.DatetimeColumn(
-                "State Change Date (Local)",
-                timezone=str(get_localzone()),
-                format="MM/DD/YYYY HH:mm:ss",
-                width="medium"
-            ),
-            "SCD UTC": st.column_config.DatetimeColumn(
-                "State Change Date (UTC)",
-                format="MM/DD/YYYY HH:mm:ss",
-                width="medium"
-            ),
-            "Area Path": st.column_config.Column(
-                "Area Path",
-                width="medium"
-            ),
-            "Tags": st.column_config.Column(
-                "Tags",
-                width="medium"
-            )
-        }
-    )
\ No newline at end of file
+    if not fresh_results:
+        st.subheader("Last Analysis Results")
+    _render_results(st.session_state.analysis_df, st.session_state.cross_df)
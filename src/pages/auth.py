@@ -1,8 +1,8 @@
 import streamlit as st
 import os
 import requests
-import base64
 from dotenv import load_dotenv
+from src.services.http import basic_auth_token, load_json
 
 load_dotenv()
 
@@ -28,10 +28,9 @@ if st.button("Check Health Status", width="stretch", icon=":material/health_cros
     else:
         try:
             # Build headers
-            token = base64.b64encode(f":{pat}".encode()).decode()
             headers = {
                 "Accept": "application/json",
-                "Authorization": f"Basic {token}"
+                "Authorization": f"Basic {basic_auth_token(pat)}"
             }
 
             # Organization-level health check endpoint
@@ -41,7 +40,7 @@ if st.button("Check Health Status", width="stretch", icon=":material/health_cros
                 response = requests.get(url, headers=headers, timeout=10)
 
             if response.status_code == 200:
-                data = response.json()
+                data = load_json(response)
                 project_count = data.get("count", "Unknown")
 
                 if isinstance(project_count, int) and project_count > 0:
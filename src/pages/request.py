@@ -1,9 +1,8 @@
 import streamlit as st
-import requests
 import os
 from dotenv import load_dotenv
-import base64
-from tzlocal import get_localzone
+from src.helpers import LOCAL_TZ_NAME
+from src.services.http import create_session, load_json
 # Load environment variables
 load_dotenv()
 
@@ -11,31 +10,33 @@ load_dotenv()
 AZURE_DEVOPS_URL = os.getenv('AZURE_DEVOPS_URL')
 AZURE_DEVOPS_PAT = os.getenv('AZURE_DEVOPS_PAT')
 
-# Create Basic Auth header with PAT
-authorization = str(base64.b64encode(f":{AZURE_DEVOPS_PAT}".encode('ascii')).decode('ascii'))
-
-# Configure headers for Azure DevOps API
-headers = {
-    'Accept': 'application/json',
-    'Authorization': f'Basic {authorization}'
-}
+@st.cache_resource
+def get_session(pat):
+    """Session shared across reruns so repeated requests reuse the TCP/TLS connection"""
+    return create_session(pat)
 
 def run_request(url):
-    response = requests.get(url,headers=headers)
+    response = get_session(AZURE_DEVOPS_PAT).get(url)
     if response.status_code == 200:
-        data = response.json()
+        data = load_json(response)
         return data
     else:
         return f"Error: {response.status_code} - {response.text}"
 
+def iter_pages(url, max_pages):
+    """Yield response pages, following the reporting API's nextLink until isLastBatch"""
+    for _ in range(max_pages):
+        data = run_request(url)
+        yield data
+        if not isinstance(data, dict) or data.get("isLastBatch", True) or not data.get("nextLink"):
+            return
+        url = data["nextLink"]
+
 # ---------------------- Streamlit UI ----------------------
 
 st.title("Azure DevOps request builder")
 
-# Detect local timezone automatically
-local_tz = str(get_localzone())
-
-st.badge(f"Your timezone: **{local_tz}**", icon=":material/globe_location_pin:")
+st.badge(f"Your timezone: **{LOCAL_TZ_NAME}**", icon=":material/globe_location_pin:")
 
 st.caption("""
 **Usage Notes:**
@@ -46,37 +47,44 @@ st.caption("""
 
 query = st.text_area("Enter url request:", f"{AZURE_DEVOPS_URL}/_apis/wit/reporting/workitemrevisions?api-version=7.1&startDateTime=2025-10-07T00:00:00")
 
+follow_pages = st.checkbox("Follow continuation pages", help="Keep requesting nextLink until the last batch")
+max_pages = st.number_input("Max pages", min_value=1, max_value=500, value=20, disabled=not follow_pages)
+
+# Campos que quieres mostrar
+desired_fields = [
+    "System.Id",
+    "System.Title",
+    "System.WorkItemType",
+    "System.State",
+    "System.AreaPath",
+    "System.Tags",
+    "System.TeamProject",
+    "Microsoft.VSTS.Common.StateChangeDate"
+]
+
 # Button to execute query
 if st.button("Run request"):
     if query.strip():
-        results = run_request(query)
-        if isinstance(results, dict) and "values" in results:
-            work_items = results["values"]
-
-            # Campos que quieres mostrar
-            desired_fields = [
-                "System.Id",
-                "System.Title",
-                "System.WorkItemType",
-                "System.State",
-                "System.AreaPath",
-                "System.Tags",
-                "System.TeamProject",
-                "Microsoft.VSTS.Common.StateChangeDate"
-            ]
-
-            # Extrae solo los campos deseados
-            filtered_items = []
-            for item in work_items:
+        filtered_items = []
+        error = None
+        pages = 0
+
+        # Extrae solo los campos deseados, page by page so only one raw page is held at a time
+        for page in iter_pages(query, max_pages if follow_pages else 1):
+            if not (isinstance(page, dict) and "values" in page):
+                error = page
+                break
+            pages += 1
+            for item in page["values"]:
                 fields = item.get("fields", {})
-                filtered = {field: fields.get(field, None) for field in desired_fields}
-                filtered_items.append(filtered)
-
-            st.success(f"Found {len(filtered_items)} work items.")
-            st.json(filtered_items)
+                filtered_items.append({field: fields.get(field, None) for field in desired_fields})
 
+        if error and not pages:
+            st.error(error)
         else:
-            st.error(results)
+            if error:
+                st.warning(f"Stopped after {pages} pages: {error}")
+            st.success(f"Found {len(filtered_items)} work items in {pages} page(s).")
+            st.json(filtered_items)
     else:
         st.error("Please enter url request")
-
@@ -1,238 +1,410 @@
 import requests
-import base64
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any, Set
-import time
-from src.config import areasPathEDW,areasPathCOE, tagsCOE
-import json
-import pytz
-from tzlocal import get_localzone
-from src.helpers import setup_logger
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Set, FrozenSet, Iterable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from cachetools import LRUCache, TTLCache
+from src.config import areasPathEDW,areasPathCOE
+import logging
+from src.helpers import setup_logger, LOCAL_TZ
+from src.services.http import create_session, load_json
 
 logger = setup_logger('azure_devops_service')
 
+# Fields needed to enrich updates with current work item details
+WORK_ITEM_DETAIL_FIELDS = [
+    'System.Id',
+    'System.Title',
+    'System.WorkItemType',
+    'System.AreaPath',
+    'System.Tags',
+    'System.TeamProject'
+]
+
+# Update fields read by analyze_state_changes; cached updates keep only these
+UPDATE_FIELDS = (
+    'System.State',
+    'Microsoft.VSTS.Common.StateChangeDate',
+    'System.Title',
+    'System.WorkItemType',
+    'System.AreaPath',
+    'System.Tags'
+)
+
+# Columns of each state's 'items' in analyze_state_changes output (one parallel list per key)
+STATE_CHANGE_COLUMNS = (
+    'id', 'title', 'date', 'project', 'work_item_type',
+    'area_path', 'tags', 'old_state', 'new_state', 'changed_by'
+)
+
 
 class AzureDevOpsService:
     def __init__(self, url: str, pat: str):
         self.url = url
-        self.headers = {
-            'Accept': 'application/json',
-            'Authorization': f'Basic {str(base64.b64encode(f":{pat}".encode("ascii")).decode("ascii"))}'
-        }
+        # Shared session keeps TCP/TLS connections alive between calls;
+        # pool sized for the concurrent updates fetch in fetch_work_item_updates
+        self.session = create_session(pat, pool_maxsize=20)
         self.areaPathEDW = areasPathEDW
         self.areaPathCOE = areasPathCOE
-        self.cache = {}
         self.cache_duration = 3600
-        self.work_item_updates_cache = {}
+        # Bounded with per-entry expiry (one entry per work item ID for details);
+        # the service is a process-wide singleton, so guard it for concurrent sessions
+        self.cache = TTLCache(maxsize=10_000, ttl=self.cache_duration)
+        self._cache_lock = threading.Lock()
+        # Update history is append-only, so short-lived stale reads are safe;
+        # bounded so long sessions don't grow without limit
+        self.work_item_updates_cache = TTLCache(maxsize=10_000, ttl=self.cache_duration)
+        # ETag + updates kept past the TTL so an expired entry is revalidated
+        # with a conditional GET (304, no body) instead of refetched in full
+        self._updates_etags = LRUCache(maxsize=10_000)
+        self._updates_cache_lock = threading.Lock()
+
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _record_fetch_error(errors: List[str], message: str):
+        """Log a skipped fetch and add it to the caller's per-run error list, if one was passed"""
+        logger.error(message)
+        if errors is not None:
+            errors.append(message)
 
     def get_team_projects(self) -> List[str]:
         """Get list of team projects"""
         try:
             url = f"{self.url}/_apis/projects?api-version=7.0"
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url)
             response.raise_for_status()
-            return [project['name'] for project in response.json()['value']]
+            return [project['name'] for project in load_json(response)['value']]
         except requests.exceptions.RequestException as e:
             raise Exception(f"Error fetching team projects: {str(e)}")
 
-    def _get_cache_key(self, func_name: str, *args) -> str:
-        return f"{func_name}:{':'.join(str(arg) for arg in args)}"
+    def _get_cache_key(self, func_name: str, *args) -> Tuple:
+        # Hashable tuple key: no O(N) string building for large ID lists
+        return (func_name,) + tuple(self._hashable(arg) for arg in args)
+
+    @staticmethod
+    def _hashable(arg: Any) -> Any:
+        """Make a cache key argument hashable; sets compare equal regardless of order"""
+        if isinstance(arg, list):
+            return tuple(arg)
+        if isinstance(arg, (set, frozenset)):
+            return frozenset(arg)
+        if isinstance(arg, dict):
+            return frozenset(arg.items())
+        return arg
 
     def _get_cached_result(self, func_name: str, *args) -> Any:
         key = self._get_cache_key(func_name, *args)
-        if key in self.cache:
-            cached = self.cache[key]
-            if time.time() - cached['timestamp'] < self.cache_duration:
-                return cached['result']
-        return None
+        with self._cache_lock:
+            return self.cache.get(key)
 
     def _cache_result(self, func_name: str, *args, result: Any):
         key = self._get_cache_key(func_name, *args)
-        self.cache[key] = {
-            'result': result,
-            'timestamp': time.time()
-        }
+        with self._cache_lock:
+            self.cache[key] = result
         return result
 
+    def _fetch_revision_ids(self, project: str, start_utc: datetime, end_utc: datetime,
+                            work_item_types: FrozenSet[str]) -> Set[int]:
+        """Get IDs of matching work item types revised in a project within the UTC range"""
+        url = f"{self.url}/{project}/_apis/wit/reporting/workitemrevisions"
+        params = {
+            'api-version': '7.1',
+            'startDateTime': start_utc.strftime("%Y-%m-%dT%H:%M:%S"),
+            'fields': 'System.Id,System.WorkItemType,System.ChangedDate'
+        }
+        
+        ids = set()
+        pages = 0
+        while True:
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            data = load_json(response)
+            pages += 1
+            
+            for rev in data.get('values', []):
+                get_field = rev.get('fields', {}).get
+                changed_date = get_field('System.ChangedDate')
+                if changed_date:
+                    try:
+                        if datetime.fromisoformat(changed_date) > end_utc:
+                            continue
+                    except ValueError as e:
+                        logger.error(f"Error parsing date {changed_date}: {str(e)}")
+                        continue
+                
+                wit = get_field('System.WorkItemType')
+                if wit in work_item_types:
+                    work_item_id = get_field('System.Id')
+                    if work_item_id:
+                        ids.add(work_item_id)
+            
+            # Only continuation order is guaranteed, not ChangedDate order, so page
+            # to the last batch and leave the end bound to the filter above
+            if data.get('isLastBatch', True) or not data.get('continuationToken'):
+                break
+            params['continuationToken'] = data['continuationToken']
+        
+        logger.info(f"Fetched {pages} revision batch(es) for {project}")
+        return ids
+
     def _get_unique_work_item_ids(self, team_projects: List[str], 
                                    work_item_types: List[str],
                                    start_date: datetime, 
-                                   end_date: datetime) -> Set[int]:
+                                   end_date: datetime,
+                                   max_workers: int = 8,
+                                   errors: List[str] = None) -> Set[int]:
         """Get unique work item IDs from all projects within date range"""
         unique_ids = set()
-        current_date = start_date.date()
-        end_date_only = end_date.date()
         
-        # Convert to UTC for API calls
-        local_tz = datetime.now().astimezone().tzinfo
+        # Convert local range bounds to UTC for API calls
+        if start_date.tzinfo is None:
+            start_date = start_date.replace(tzinfo=LOCAL_TZ)
+        if end_date.tzinfo is None:
+            end_date = end_date.replace(tzinfo=LOCAL_TZ)
+        start_utc = start_date.astimezone(timezone.utc)
+        end_utc = end_date.astimezone(timezone.utc)
         
-        logger.info(f"Fetching unique work item IDs from {current_date} to {end_date_only}")
+        logger.info(f"Fetching unique work item IDs from {start_utc} to {end_utc}")
         
-        while current_date <= end_date_only:
-            # Create datetime at start of day in UTC
-            day_start = datetime.combine(current_date, datetime.min.time())
-            if day_start.tzinfo is None:
-                day_start = day_start.replace(tzinfo=local_tz)
-            day_start_utc = day_start.astimezone(timezone.utc)
-            start_str = day_start_utc.strftime("%Y-%m-%dT%H:%M:%S")
-            
-            for project in team_projects:
-                url = f"{self.url}/{project}/_apis/wit/reporting/workitemrevisions"
-                params = {
-                    'api-version': '7.1',
-                    'startDateTime': start_str,
-                    'fields': 'System.Id,System.WorkItemType'
-                }
-                
+        # Checked once per revision, so use a set rather than a list scan
+        work_item_types = frozenset(work_item_types)
+        
+        # One paged scan per project; projects are independent, so run them concurrently.
+        # The worker cap bounds load on ADO and 429s are retried by the session.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch_revision_ids, project, start_utc, end_utc, work_item_types): project
+                for project in team_projects
+            }
+            for future in as_completed(futures):
+                project = futures[future]
                 try:
-                    logger.info(f"Fetching revisions for {project} on {current_date}")
-                    response = requests.get(url, headers=self.headers, params=params)
-                    response.raise_for_status()
-                    
-                    data = response.json()
-                    if 'values' in data:
-                        for rev in data['values']:
-                            fields = rev.get('fields', {})
-                            wit = fields.get('System.WorkItemType')
-                            
-                            if wit in work_item_types:
-                                work_item_id = fields.get('System.Id')
-                                if work_item_id:
-                                    unique_ids.add(work_item_id)
-                    
-                    time.sleep(0.1)  # Rate limiting
-                    
+                    unique_ids.update(future.result())
                 except requests.exceptions.RequestException as e:
-                    logger.error(f"Error fetching revisions for {project} on {current_date}: {str(e)}")
+                    self._record_fetch_error(errors, f"Error fetching revisions for {project}: {str(e)}")
                     continue
-            
-            current_date += timedelta(days=1)
         
         logger.info(f"Found {len(unique_ids)} unique work item IDs")
         return unique_ids
 
-    def get_work_item_details(self, work_item_id: int) -> Dict:
-        """Get current work item details"""
-        try:
-            url = f"{self.url}/_apis/wit/workitems/{work_item_id}"
-            params = {
-                'api-version': '7.1',
-                'fields': 'System.Id,System.Title,System.WorkItemType,System.State,System.AreaPath,System.Tags,System.TeamProject'
-            }
-            
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            fields = data.get('fields', {})
-            
-            return {
-                'id': fields.get('System.Id'),
-                'title': fields.get('System.Title'),
-                'work_item_type': fields.get('System.WorkItemType'),
-                'area_path': fields.get('System.AreaPath'),
-                'tags': fields.get('System.Tags', ''),
-                'team_project': fields.get('System.TeamProject')
+    def _to_work_item_details(self, fields: Dict) -> Dict:
+        """Map raw work item fields to the details dict used to enrich updates"""
+        return {
+            'id': fields.get('System.Id'),
+            'title': fields.get('System.Title'),
+            'work_item_type': fields.get('System.WorkItemType'),
+            'area_path': fields.get('System.AreaPath'),
+            'tags': fields.get('System.Tags', ''),
+            'team_project': fields.get('System.TeamProject')
+        }
+
+    def _get_work_items_chunk(self, chunk: List[int]) -> Dict[int, Dict]:
+        """POST a single chunk of up to 200 IDs to the workitemsbatch API"""
+        url = f"{self.url}/_apis/wit/workitemsbatch?api-version=7.0"
+        body = {
+            'ids': chunk,
+            'fields': WORK_ITEM_DETAIL_FIELDS,
+            'errorPolicy': 'omit'
+        }
+        
+        response = self.session.post(url, json=body)
+        response.raise_for_status()
+        
+        details_by_id = {}
+        for work_item in load_json(response).get('value', []):
+            # With errorPolicy=omit, missing/deleted items come back as null
+            if work_item:
+                details_by_id[work_item['id']] = self._to_work_item_details(work_item.get('fields', {}))
+        return details_by_id
+
+    def get_work_items_batch(self, work_item_ids: List[int], batch_size: int = 200,
+                             max_workers: int = 8, errors: List[str] = None) -> Dict[int, Dict]:
+        """Get current details for many work items via the workitemsbatch API (max 200 IDs per call)"""
+        # Details are cached per ID, so overlapping requests only fetch the misses
+        details_by_id = {}
+        ids = []
+        for work_item_id in work_item_ids:
+            cached = self._get_cached_result('work_item_details', work_item_id)
+            if cached is not None:
+                details_by_id[work_item_id] = cached
+            else:
+                ids.append(work_item_id)
+        
+        chunks = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+        
+        # Chunks are independent, so issue them concurrently (capped to avoid ADO throttling)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._get_work_items_chunk, chunk): batch_number
+                for batch_number, chunk in enumerate(chunks, 1)
             }
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching details for work item {work_item_id}: {str(e)}")
-            return {}
+            for future in as_completed(futures):
+                try:
+                    fetched = future.result()
+                except requests.exceptions.RequestException as e:
+                    self._record_fetch_error(errors, f"Error fetching work item batch {futures[future]}: {str(e)}")
+                    continue
+                
+                for work_item_id, details in fetched.items():
+                    details_by_id[work_item_id] = self._cache_result('work_item_details', work_item_id, result=details)
+        
+        return details_by_id
 
     def _extract_changed_by(self, update: Dict) -> str:
         """Extract the person who made the change from update"""
         revised_by = update.get('revisedBy', {})
         return revised_by.get('displayName', 'Unknown')
 
-    def get_work_item_updates(self, work_item_id: int) -> List[Dict]:
+    def get_work_item_updates(self, work_item_id: int, errors: List[str] = None) -> List[Dict]:
         """Get all historical updates for a work item"""
         # Check cache first
-        if work_item_id in self.work_item_updates_cache:
-            cached = self.work_item_updates_cache[work_item_id]
-            if time.time() - cached['timestamp'] < self.cache_duration:
-                return cached['updates']
+        with self._updates_cache_lock:
+            cached = self.work_item_updates_cache.get(work_item_id)
+            validator = self._updates_etags.get(work_item_id)
+        if cached is not None:
+            return cached
         
         try:
             url = f"{self.url}/_apis/wit/workitems/{work_item_id}/updates"
             params = {'api-version': '7.1', '$top': 200}
+            headers = {'If-None-Match': validator[0]} if validator else None
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, headers=headers)
+            if response.status_code == 304:
+                updates = validator[1]
+                with self._updates_cache_lock:
+                    self.work_item_updates_cache[work_item_id] = updates
+                return updates
             response.raise_for_status()
             
-            data = response.json()
-            updates = data.get('value', [])
-            
-            # Get work item details to enrich updates
-            wi_details = self.get_work_item_details(work_item_id)
-            
-            # Enrich each update with work item details
-            for update in updates:
-                update['_work_item_details'] = wi_details
+            data = load_json(response)
+            updates = [self._slim_update(update) for update in data.get('value', [])]
             
             # Cache the result
-            self.work_item_updates_cache[work_item_id] = {
-                'updates': updates,
-                'timestamp': time.time()
-            }
+            etag = response.headers.get('ETag')
+            with self._updates_cache_lock:
+                self.work_item_updates_cache[work_item_id] = updates
+                if etag:
+                    self._updates_etags[work_item_id] = (etag, updates)
             
             return updates
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching updates for work item {work_item_id}: {str(e)}")
+            self._record_fetch_error(errors, f"Error fetching updates for work item {work_item_id}: {str(e)}")
             return []
 
+    def _slim_update(self, update: Dict) -> Dict:
+        """Project an update down to rev, revisedBy name and UPDATE_FIELDS before caching"""
+        fields = update.get('fields', {})
+        return {
+            'rev': update.get('rev'),
+            'revisedBy': {'displayName': update.get('revisedBy', {}).get('displayName', 'Unknown')},
+            'fields': {name: fields[name] for name in UPDATE_FIELDS if name in fields}
+        }
+
+    def fetch_work_item_updates(self, work_item_ids: Iterable[int],
+                                max_workers: int = 20,
+                                errors: List[str] = None) -> Iterator[Tuple[int, List[Dict]]]:
+        """Fetch updates for many work items concurrently, yielding (id, updates) as each completes"""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.get_work_item_updates, work_item_id, errors): work_item_id
+                for work_item_id in work_item_ids
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
     def analyze_state_changes(self, work_item_ids: Set[int], 
                              selected_states: List[str],
                              start_date: datetime, 
-                             end_date: datetime) -> Dict[str, Dict]:
-        """Analyze state changes from work item updates"""
+                             end_date: datetime,
+                             errors: List[str] = None) -> Dict[str, Dict]:
+        """
+        Analyze state changes from work item updates
+        
+        Args:
+            errors: Optional list that receives a message for every fetch
+                that failed and was skipped during this call
+        
+        Returns:
+            Dict: state -> {'count': int, 'items': {column: list}}, with one
+            parallel list per STATE_CHANGE_COLUMNS entry
+        """
         
         if isinstance(start_date, str):
             start_date = datetime.strptime(start_date, '%Y-%m-%d %H:%M:%S')
         if isinstance(end_date, str):
             end_date = datetime.strptime(end_date, '%Y-%m-%d %H:%M:%S')
         
-        local_tz = str(get_localzone())
-        tz = pytz.timezone(local_tz)
-        
         # Localize start and end
         if start_date.tzinfo is None:
-            local_start = tz.localize(start_date)
+            local_start = start_date.replace(tzinfo=LOCAL_TZ)
         else:
-            local_start = start_date.astimezone(tz)
+            local_start = start_date.astimezone(LOCAL_TZ)
             
         if end_date.tzinfo is None:
-            local_end = tz.localize(end_date)
+            local_end = end_date.replace(tzinfo=LOCAL_TZ)
         else:
-            local_end = end_date.astimezone(tz)
+            local_end = end_date.astimezone(LOCAL_TZ)
         
-        start_utc = local_start.astimezone(timezone.utc)
-        end_utc = local_end.astimezone(timezone.utc)
+        # Compare plain POSIX timestamps in the loop instead of aware datetimes
+        start_ts = local_start.timestamp()
+        end_ts = local_end.timestamp()
         
-        state_analysis = {state: {'count': 0, 'items': []} for state in selected_states}
-        processed_items = set()
+        # Items are stored column-wise so they load straight into a DataFrame
+        state_analysis = {
+            state: {'count': 0, 'items': {column: [] for column in STATE_CHANGE_COLUMNS}}
+            for state in selected_states
+        }
+        # Built after state_analysis so results keep the selection order
+        selected_state_set = frozenset(selected_states)
         
         logger.info("=" * 50 + "START" + "=" * 50)
         
+        # I/O stage: fetch every item's updates concurrently and their details in
+        # batches of 200 (cache hits when the caller already prefetched the updates)
+        work_item_ids = list(work_item_ids)
+        updates_by_id = dict(self.fetch_work_item_updates(work_item_ids, errors=errors))
+        details_by_id = self.get_work_items_batch(work_item_ids, errors=errors)
+        
+        # CPU stage: scan the materialized updates in a stable order
+        total = len(work_item_ids)
         for idx, work_item_id in enumerate(work_item_ids, 1):
-            logger.info(f"Processing work item {idx}/{len(work_item_ids)}: ID {work_item_id}")
+            # Progress every 50 items instead of one line per item
+            if idx % 50 == 0 or idx == total:
+                logger.info("Processing work item %d/%d", idx, total)
+            
+            updates = updates_by_id[work_item_id]
+            get_detail = details_by_id.get(work_item_id, {}).get
             
-            updates = self.get_work_item_updates(work_item_id)
+            # Updates come grouped per work item and ordered by rev, so duplicates
+            # can only repeat within this item; the set is dropped after each one
+            seen_changes = set()
             
             for update in updates:
                 fields = update.get('fields', {})
+                get_field = fields.get  # bound once; looked up several times per update
                 
                 # Check if there's a state change in this update
-                state_change = fields.get('System.State')
+                state_change = get_field('System.State')
                 if not state_change:
                     continue
                 
                 new_state = state_change.get('newValue')
-                if new_state not in selected_states:
+                if new_state not in selected_state_set:
                     continue
                 
                 # Get the state change date
-                state_change_date_field = fields.get('Microsoft.VSTS.Common.StateChangeDate')
+                state_change_date_field = get_field('Microsoft.VSTS.Common.StateChangeDate')
                 if not state_change_date_field:
                     continue
                 
@@ -240,74 +412,72 @@ class AzureDevOpsService:
                 if not state_change_date_str:
                     continue
                 
-                # Parse the date
+                # Parse the date (fromisoformat handles the trailing 'Z' and any fraction on 3.11+)
                 try:
-                    clean_date_str = state_change_date_str.replace('Z', '').split('.')[0]
-                    state_date = datetime.strptime(clean_date_str, '%Y-%m-%dT%H:%M:%S')
-                    state_date = state_date.replace(tzinfo=timezone.utc)
+                    state_date = datetime.fromisoformat(state_change_date_str)
+                    if state_date.tzinfo is None:
+                        state_date = state_date.replace(tzinfo=timezone.utc)
                 except ValueError as e:
                     logger.error(f"Error parsing date {state_change_date_str}: {str(e)}")
                     continue
                 
-                is_within_range = start_utc <= state_date <= end_utc
+                is_within_range = start_ts <= state_date.timestamp() <= end_ts
                 
-                logger.info(
-                    f"WID: {work_item_id} | Rev: {update.get('rev')} | "
-                    f"State: {new_state} | Date: {state_date.strftime('%Y-%m-%d %H:%M:%S')} | "
-                    f"InRange: {is_within_range}"
-                )
+                # Per-update trace: debug only, formatted lazily and skipped unless enabled
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "WID: %s | Rev: %s | State: %s | Date: %s | InRange: %s",
+                        work_item_id, update.get('rev'), new_state, state_date, is_within_range
+                    )
                 
                 if is_within_range:
-                    item_key = (work_item_id, new_state, state_change_date_str)
+                    change_key = (new_state, state_change_date_str)
                     
-                    if item_key not in processed_items:
-                        processed_items.add(item_key)
-                        
-                        # Get additional info from update or work item details
-                        wi_details = update.get('_work_item_details', {})
+                    if change_key not in seen_changes:
+                        seen_changes.add(change_key)
                         
                         # Try to get from update first, then fall back to details
-                        title = (update.get('fields', {}).get('System.Title', {}).get('newValue') 
-                                or wi_details.get('title', 'N/A'))
+                        title = (get_field('System.Title', {}).get('newValue')
+                                or get_detail('title', 'N/A'))
                         old_state = state_change.get('oldValue', 'N/A')
-                        work_item_type = (update.get('fields', {}).get('System.WorkItemType', {}).get('newValue')
-                                        or wi_details.get('work_item_type', 'N/A'))
-                        area_path = (update.get('fields', {}).get('System.AreaPath', {}).get('newValue')
-                                   or wi_details.get('area_path', 'N/A'))
-                        tags = (update.get('fields', {}).get('System.Tags', {}).get('newValue')
-                              or wi_details.get('tags', ''))
-                        team_project = wi_details.get('team_project', 'N/A')
+                        work_item_type = (get_field('System.WorkItemType', {}).get('newValue')
+                                        or get_detail('work_item_type', 'N/A'))
+                        area_path = (get_field('System.AreaPath', {}).get('newValue')
+                                   or get_detail('area_path', 'N/A'))
+                        tags = (get_field('System.Tags', {}).get('newValue')
+                              or get_detail('tags', ''))
+                        team_project = get_detail('team_project', 'N/A')
                         changed_by = self._extract_changed_by(update)
                         
-                        state_analysis[new_state]['count'] += 1
-                        state_analysis[new_state]['items'].append({
-                            'id': work_item_id,
-                            'title': title,
-                            'date': state_change_date_str,
-                            'project': team_project,
-                            'work_item_type': work_item_type,
-                            'area_path': area_path,
-                            'tags': tags,
-                            'old_state': old_state,
-                            'new_state': new_state,
-                            'changed_by': changed_by
-                        })
-            
-            time.sleep(0.05)  # Rate limiting
+                        bucket = state_analysis[new_state]
+                        bucket['count'] += 1
+                        items = bucket['items']
+                        items['id'].append(work_item_id)
+                        items['title'].append(title)
+                        items['date'].append(state_change_date_str)
+                        items['project'].append(team_project)
+                        items['work_item_type'].append(work_item_type)
+                        items['area_path'].append(area_path)
+                        items['tags'].append(tags)
+                        items['old_state'].append(old_state)
+                        items['new_state'].append(new_state)
+                        items['changed_by'].append(changed_by)
         
         logger.info("=" * 50 + "FINISH" + "=" * 50)
         return state_analysis
 
     def get_work_item_revisions(self, team_projects: List[str], work_item_types: List[str],
-                                start_date: datetime, end_date: datetime) -> Dict:
-        """Main method to get work item revisions by date range"""
+                                start_date: datetime, end_date: datetime,
+                                errors: List[str] = None) -> Dict:
+        """Main method to get work item revisions by date range; skipped projects go to errors"""
         try:
             # Step 1: Get unique work item IDs
             work_item_ids = self._get_unique_work_item_ids(
                 team_projects, 
                 work_item_types,
                 start_date, 
-                end_date
+                end_date,
+                errors=errors
             )
             
             return {
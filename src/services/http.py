@@ -0,0 +1,79 @@
+import base64
+import time
+from typing import Any
+import requests
+from requests.adapters import HTTPAdapter
+import orjson
+from urllib3.util.retry import Retry
+
+# Back off only when Azure DevOps reports the rate limit budget is nearly spent
+RATE_LIMIT_REMAINING_THRESHOLD = 10
+MAX_RATE_LIMIT_WAIT = 30
+
+
+def basic_auth_token(pat: str) -> str:
+    """Encode a PAT for the Basic auth header"""
+    return base64.b64encode(f":{pat}".encode("utf-8")).decode("ascii")
+
+
+def create_session(pat: str, pool_maxsize: int = 16) -> requests.Session:
+    """
+    Create a keep-alive session for the Azure DevOps REST API
+    
+    Args:
+        pat: Personal Access Token used for Basic auth
+        pool_maxsize: Connections kept per host (match the number of concurrent callers)
+    
+    Returns:
+        requests.Session: Session with auth headers and retries on transient errors
+    """
+    session = requests.Session()
+    session.headers.update({
+        'Accept': 'application/json',
+        'Authorization': f'Basic {basic_auth_token(pat)}'
+    })
+    
+    # 429s wait for the server's Retry-After; raise_on_status=False hands the last
+    # response back to the caller's own status handling. POST is retried too since
+    # the only POST used (workitemsbatch) is a read.
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'POST'},
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    session.mount('https://', HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry))
+    session.hooks['response'].append(_throttle_when_near_limit)
+    return session
+
+
+def _throttle_when_near_limit(response: requests.Response, *args, **kwargs) -> None:
+    """Response hook that sleeps until X-RateLimit-Reset when few requests remain"""
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    reset = response.headers.get('X-RateLimit-Reset')
+    if remaining is None or reset is None:
+        return
+    try:
+        if float(remaining) >= RATE_LIMIT_REMAINING_THRESHOLD:
+            return
+        wait = float(reset) - time.time()
+    except ValueError:
+        return
+    if wait > 0:
+        time.sleep(min(wait, MAX_RATE_LIMIT_WAIT))
+
+
+def load_json(response: requests.Response) -> Any:
+    """
+    Parse a JSON response body with orjson
+    
+    Raises:
+        requests.exceptions.JSONDecodeError: Body is not valid JSON, same as
+            response.json(), so RequestException handlers keep catching it
+    """
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos, response=response) from e